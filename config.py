@@ -22,6 +22,10 @@ headers = {
 
 # 每页文章数量
 post_per_page = 10
+# json 接口单页请求数量, 尽量取接口允许的最大值以减少请求次数
+json_per_page = 100
+# json 接口可能限制的单页数量, 第一页恰好返回这些数量时继续获取下一页
+json_page_size_caps = (10, 15, 20, 50)
 
 # 热门配置
 trending_type_weekly = "weekly"
@@ -32,3 +36,46 @@ trending_monthly_title = "30 日热门"
 trending_post_per_page = 20
 # 最大页码数量
 trending_post_max_page = 18
+
+# 内存上限 (MB), 超出时先暂停获取文章列表, 仍然超出则结束抓取, 0 表示不限制
+memory_budget = 0
+# 内存软限制比例, 超出 memory_budget * memory_soft_ratio 时暂停获取文章列表并回收内存
+memory_soft_ratio = 0.8
+# 文章列表与文章抓取之间的队列长度
+slug_queue_size = 100
+# 文章去重布隆过滤器的预计容量与误判率
+bloom_capacity = 1000000
+bloom_error_rate = 0.000001
+
+# 监控的文章统计字段
+monitor_fields = ('views_count', 'likes_count', 'comments_count')
+# 监控检查间隔 (秒), 数据变化时减半, 未变化时加倍
+monitor_interval = 600
+monitor_interval_min = 60
+monitor_interval_max = 86400
+# 监控模式重新获取文章列表的间隔 (秒)
+monitor_relist_interval = 3600
+# 监控状态保存间隔 (秒)
+monitor_save_interval = 60
+# 监控状态文件和变化记录文件
+monitor_state_file = "monitor_state.json"
+monitor_log_file = "monitor_log.jsonl"
+
+# 文章内容索引文件, 保存在输出目录下
+content_index_file = ".content_index.json"
+# 规范化内容少于该长度时不去重
+dedupe_min_length = 50
+# SimHash 字符 shingle 长度
+simhash_shingle_size = 4
+# SimHash 海明距离不超过该值时视为近似重复, 不能超过 3
+simhash_distance = 3
+
+# 性能分析的阶段函数
+profile_stages = ('requests_get', 'BeautifulSoup', 'get_trending', 'get_notebook', 'get_user', 'get_collection',
+                  'get_post', 'get_post_metrics', 'page_parse', 'write_post')
+# 调用栈采样间隔 (秒)
+profile_sample_interval = 0.005
+# 每个阶段做内存快照对比的调用次数
+profile_snapshot_calls = 3
+# 每个阶段输出的内存分配位置数量
+profile_top_allocations = 10
@@ -3,9 +3,25 @@
 import os
 import re
 import sys
+import gc
+import math
+import array
+import queue
+import time
+import heapq
+import ctypes
+import hashlib
 import getopt
+import functools
+import atexit
+import dis
+import cProfile
+import tracemalloc
+import collections
+import threading
+import urllib.parse
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import json
 import html2text
 import config
@@ -14,17 +30,416 @@ import config
 verbose = False
 # 下载文章数量
 download_count = 0
+# 是否开启性能分析
+profiling = False
+# 内存上限 (MB), 超出时先暂停获取文章列表, 仍然超出则结束抓取, 0 表示不限制
+memory_budget = config.memory_budget
 
 
-def requests_get(url, params=None, headers=None, match_text=None):
+class Post(object):
+    """
+    单篇文章数据, 使用 __slots__ 减少每条记录的内存占用
+    """
+    __slots__ = ('title', 'author_name', 'author_id', 'author_slug', 'publish_time', 'word_count',
+                 'views_count', 'notebook_id', 'post_id', 'post_slug', 'likes_count', 'commentable',
+                 'comments_count', 'content', 'duplicate_of')
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, None)
+
+    def meta(self):
+        """
+        获取文章元数据
+        :return: 除文章内容和重复标记外的 (字段, 值) 列表
+        """
+        return [(name, getattr(self, name)) for name in self.__slots__ if name not in ('content', 'duplicate_of')]
+
+
+class BloomFilter(object):
+    """
+    布隆过滤器, 以固定大小的 bytearray 记录已抓取的 slug
+    """
+    __slots__ = ('size', 'hash_count', 'bits')
+
+    def __init__(self, capacity, error_rate):
+        """
+        :param capacity: 预计元素数量
+        :param error_rate: 误判率
+        """
+        self.size = int(-capacity * math.log(error_rate) / (math.log(2) ** 2)) + 1
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray(self.size // 8 + 1)
+
+    def add(self, key):
+        """
+        添加元素
+        :param key: 字符串
+        :return: 元素之前不存在时返回 True
+        """
+        digest = hashlib.sha1(key.encode('utf-8')).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:16], 'little') | 1
+        added = False
+        for i in range(self.hash_count):
+            position = (h1 + i * h2) % self.size
+            if not self.bits[position >> 3] & (1 << (position & 7)):
+                self.bits[position >> 3] |= 1 << (position & 7)
+                added = True
+        return added
+
+
+class ContentIndex(object):
+    """
+    文章内容索引, 记录内容哈希与 SimHash, 用于识别重复和近似重复的文章, 保存在 json 文件中跨次运行使用
+    """
+    __slots__ = ('path', 'hashes', 'simhashes', 'aliases', 'slug_hashes', 'bands')
+
+    # SimHash 分段数量, 海明距离不超过 分段数量 - 1 时至少有一段完全相同
+    band_count = 4
+
+    def __init__(self, path):
+        """
+        :param path: 索引文件路径
+        """
+        self.path = path
+        # 内容哈希 -> 文章 slug
+        self.hashes = dict()
+        # 文章 slug -> SimHash
+        self.simhashes = dict()
+        # 重复文章 slug -> 原文章 slug
+        self.aliases = dict()
+        if os.path.exists(path):
+            with open(path) as f:
+                index = json.load(f)
+            self.hashes = index.get('hashes', {})
+            self.simhashes = index.get('simhashes', {})
+            self.aliases = index.get('aliases', {})
+        # 文章 slug -> 内容哈希, 只在内存中维护
+        self.slug_hashes = dict((slug, content_hash) for content_hash, slug in self.hashes.items())
+        # SimHash 分段 -> 文章 slug 列表, 只在内存中维护
+        self.bands = dict()
+        for slug, value in self.simhashes.items():
+            self._add_bands(slug, value)
+
+    def _band_keys(self, value):
+        bits = 64 // self.band_count
+        return [(i, (value >> (i * bits)) & ((1 << bits) - 1)) for i in range(self.band_count)]
+
+    def _add_bands(self, slug, value):
+        for key in self._band_keys(value):
+            self.bands.setdefault(key, []).append(slug)
+
+    def _remove(self, slug):
+        # 删除文章已记录的内容
+        old_simhash = self.simhashes.pop(slug, None)
+        if old_simhash is not None:
+            for key in self._band_keys(old_simhash):
+                if slug in self.bands.get(key, []):
+                    self.bands[key].remove(slug)
+        old_hash = self.slug_hashes.pop(slug, None)
+        if old_hash is not None and self.hashes.get(old_hash) == slug:
+            del self.hashes[old_hash]
+
+    def find_exact(self, post_slug, content_hash):
+        """
+        查找内容完全相同的文章, 不与文章自身之前记录的内容比较
+        :param post_slug: 当前文章 slug
+        :param content_hash: 规范化内容的哈希
+        :return: 原文章 slug, 不重复时返回 None
+        """
+        if self.hashes.get(content_hash, post_slug) != post_slug:
+            return self.hashes[content_hash]
+
+    def find_near(self, post_slug, content_simhash):
+        """
+        查找内容近似的文章, 不与文章自身之前记录的内容比较
+        :param post_slug: 当前文章 slug
+        :param content_simhash: 规范化内容的 SimHash
+        :return: 原文章 slug, 不重复时返回 None
+        """
+        for key in self._band_keys(content_simhash):
+            for slug in self.bands.get(key, []):
+                if slug == post_slug:
+                    continue
+                if bin(self.simhashes[slug] ^ content_simhash).count('1') <= config.simhash_distance:
+                    return slug
+
+    def add(self, slug, content_hash, content_simhash):
+        """
+        记录文章内容, 替换文章之前记录的内容
+        :param slug: 文章 slug
+        :param content_hash: 规范化内容的哈希
+        :param content_simhash: 规范化内容的 SimHash
+        :return: None
+        """
+        self._remove(slug)
+        self.aliases.pop(slug, None)
+        self.hashes[content_hash] = slug
+        self.slug_hashes[slug] = content_hash
+        self.simhashes[slug] = content_simhash
+        self._add_bands(slug, content_simhash)
+
+    def add_alias(self, slug, original_slug):
+        """
+        记录重复文章, 并删除文章之前记录的内容
+        :param slug: 重复文章 slug
+        :param original_slug: 原文章 slug
+        :return: None
+        """
+        self._remove(slug)
+        self.aliases[slug] = original_slug
+
+    def save(self):
+        """
+        保存索引, 先写临时文件再替换, 避免中断时损坏
+        :return: None
+        """
+        with open(self.path + '.tmp', 'w') as f:
+            json.dump({'hashes': self.hashes, 'simhashes': self.simhashes, 'aliases': self.aliases}, f)
+        os.replace(self.path + '.tmp', self.path)
+
+
+class Profiler(object):
+    """
+    性能分析, 仅在 --profile 模式下替换各抓取阶段函数, 未开启时没有任何额外开销
+    记录各阶段耗时与内存分配, 同时采样调用栈, 输出 cProfile 数据和火焰图折叠栈
+    """
+    __slots__ = ('profile', 'stages', 'stacks', 'lock', 'local', 'running', 'sampler', 'wrapper_code',
+                 'snapshotting', 'own_lines')
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        # 阶段名 -> 统计数据
+        self.stages = collections.OrderedDict()
+        # 折叠栈 -> 采样次数
+        self.stacks = collections.Counter()
+        self.lock = threading.Lock()
+        # 每个线程累计的快照开销与开启内存追踪的次数
+        self.local = threading.local()
+        self.running = False
+        self.sampler = None
+        # 阶段包装函数的代码对象, 采样时跳过
+        self.wrapper_code = None
+        # 正在做内存快照对比的线程 id, 采样时跳过
+        self.snapshotting = set()
+        # 性能分析自身代码所在行, 内存快照对比时排除
+        self.own_lines = set()
+        codes = [value.__code__ for value in vars(Profiler).values() if hasattr(value, '__code__')]
+        while codes:
+            code = codes.pop()
+            self.own_lines.update(line for _, line in dis.findlinestarts(code))
+            codes.extend(const for const in code.co_consts if hasattr(const, 'co_code'))
+
+    def install(self, namespace):
+        """
+        替换命名空间中的阶段函数
+        :param namespace: 模块命名空间
+        :return: None
+        """
+        for name in config.profile_stages:
+            self.stages[name] = {'calls': 0, 'timed_calls': 0, 'time': 0.0, 'traced_time': 0.0, 'snapshots': 0,
+                                 'memory': 0, 'allocations': collections.Counter()}
+            namespace[name] = self.wrap(name, namespace[name])
+
+    def wrap(self, name, func):
+        """
+        包装阶段函数, 记录耗时与内存分配
+        :param name: 阶段名
+        :param func: 阶段函数
+        :return: 包装后的函数
+        """
+        stage = self.stages[name]
+
+        @functools.wraps(func, updated=())
+        def wrapper(*args, **kwargs):
+            # 只对前几次调用开启内存追踪并做快照对比, 其余调用的耗时不受追踪开销影响
+            snapshot = stage['snapshots'] < config.profile_snapshot_calls
+            tracing = tracemalloc.is_tracing()
+            thread_id = threading.get_ident()
+            overhead_start = time.perf_counter()
+            before = None
+            memory = 0
+            if snapshot:
+                self.snapshotting.add(thread_id)
+                if not tracing:
+                    tracemalloc.start()
+                    self.local.traced = getattr(self.local, 'traced', 0) + 1
+                before = tracemalloc.take_snapshot()
+                memory = tracemalloc.get_traced_memory()[0]
+                self.snapshotting.discard(thread_id)
+            # 嵌套阶段的快照开销不计入本阶段耗时
+            overhead = getattr(self.local, 'overhead', 0.0)
+            # 嵌套阶段开启过内存追踪时, 本次调用的耗时也受追踪开销影响
+            traced = getattr(self.local, 'traced', 0)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start - (getattr(self.local, 'overhead', 0.0) - overhead)
+                traced = tracing or snapshot or getattr(self.local, 'traced', 0) != traced
+                allocations = collections.Counter()
+                if snapshot:
+                    self.snapshotting.add(thread_id)
+                    memory = tracemalloc.get_traced_memory()[0] - memory
+                    after = tracemalloc.take_snapshot()
+                    if not tracing:
+                        tracemalloc.stop()
+                    for stat in after.compare_to(before, 'lineno'):
+                        frame = stat.traceback[0]
+                        if stat.size_diff <= 0 or self.is_own_frame(frame):
+                            continue
+                        allocations[str(frame)] += stat.size_diff
+                    self.snapshotting.discard(thread_id)
+                    self.local.overhead = overhead + (time.perf_counter() - overhead_start - elapsed)
+                with self.lock:
+                    stage['calls'] += 1
+                    if traced:
+                        stage['traced_time'] += elapsed
+                    else:
+                        stage['timed_calls'] += 1
+                        stage['time'] += elapsed
+                    if snapshot:
+                        stage['snapshots'] += 1
+                        stage['memory'] += memory
+                        stage['allocations'].update(allocations)
+
+        self.wrapper_code = wrapper.__code__
+        return wrapper
+
+    def is_own_frame(self, frame):
+        """
+        判断内存分配是否来自性能分析自身
+        包括本类代码、tracemalloc 以及采样线程调用的 threading
+        :param frame: tracemalloc 分配位置
+        :return: 是否来自性能分析自身
+        """
+        if frame.filename == Profiler.__init__.__code__.co_filename:
+            return frame.lineno in self.own_lines
+        return frame.filename in (tracemalloc.__file__, threading.__file__)
+
+    def sample(self):
+        """
+        定时采样所有线程的调用栈
+        :return: None
+        """
+        sampler_id = threading.get_ident()
+        while self.running:
+            time.sleep(config.profile_sample_interval)
+            names = dict((thread.ident, thread.name) for thread in threading.enumerate())
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == sampler_id or thread_id in self.snapshotting:
+                    continue
+                stack = list()
+                while frame is not None:
+                    code = frame.f_code
+                    # 跳过阶段包装函数
+                    if code is not self.wrapper_code:
+                        stack.append('%s (%s:%d)' % (code.co_name, os.path.basename(code.co_filename),
+                                                     code.co_firstlineno))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        """
+        开始分析
+        :return: None
+        """
+        self.running = True
+        self.sampler = threading.Thread(target=self.sample)
+        self.sampler.daemon = True
+        self.sampler.start()
+        self.profile.enable()
+
+    def stop(self, output='./'):
+        """
+        结束分析并输出结果
+        profile.prof 为 cProfile 数据, profile.folded 为火焰图折叠栈, profile.txt 为各阶段统计
+        :param output: 输出目录
+        :return: None
+        """
+        self.profile.disable()
+        self.running = False
+        self.sampler.join()
+
+        if not os.path.exists(output):
+            os.makedirs(output)
+        self.profile.dump_stats(output + "/profile.prof")
+        with open(output + "/profile.folded", "w") as f:
+            [f.write(stack + " " + str(count) + "\n") for stack, count in self.stacks.items()]
+        with open(output + "/profile.txt", "w") as f:
+            for name, stage in self.stages.items():
+                if stage['calls'] == 0:
+                    continue
+                # 耗时只统计未开启内存追踪的调用, 全部调用都被追踪时才使用追踪时的耗时
+                timed_calls, elapsed, label = stage['timed_calls'], stage['time'], 'time'
+                if timed_calls == 0:
+                    timed_calls, elapsed, label = stage['calls'], stage['traced_time'], 'traced time'
+                f.write("%s\tcalls: %d\t%s: %.3fs\tavg: %.3fs\tsnapshots: %d\tmemory: %d KiB\n" % (
+                    name, stage['calls'], label, elapsed, elapsed / timed_calls, stage['snapshots'],
+                    stage['memory'] // 1024))
+                for line, size in stage['allocations'].most_common(config.profile_top_allocations):
+                    # 忽略不足 1 KiB 的分配
+                    if size < 1024:
+                        break
+                    f.write("\t%d KiB\t%s\n" % (size // 1024, line))
+        print("性能分析结果\t--->\t", output + "/profile.txt")
+
+
+def normalize_content(content):
+    """
+    规范化文章内容, 忽略空白与大小写差异, 图片以链接参与比较
+    :param content: 文章内容节点
+    :return: 规范化文本
+    """
+    text = ' '.join(content.get_text(' ').split()).lower()
+    images = ' '.join(img.get('src') or '' for img in content.findAll('img'))
+    return (text + ' ' + images).strip()
+
+
+# 字节值 -> 第 n 位的值, 用于按位统计 SimHash 特征
+simhash_bit_tables = [bytes((value >> bit) & 1 for value in range(256)) for bit in range(8)]
+
+
+def simhash(text):
+    """
+    计算文本的 64 位 SimHash, 以字符 shingle 作为特征
+    :param text: 规范化文本
+    :return: SimHash
+    """
+    size = config.simhash_shingle_size
+    # 重复的 shingle 只计一次
+    features = set(text[i: i + size] for i in range(max(1, len(text) - size + 1)))
+    digests = b''.join(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest() for feature in features)
+    # 按位统计: 取出所有特征的同一字节, 用 translate 映射为该位的 0 / 1 后计数
+    half = len(features) / 2
+    value = 0
+    for byte in range(8):
+        column = digests[byte::8]
+        for bit in range(8):
+            if column.translate(simhash_bit_tables[bit]).count(1) > half:
+                value |= 1 << (byte * 8 + bit)
+    return value
+
+
+def requests_get(url, params=None, headers=None, match_text=None, exit_on_error=True):
     """
     代理 requests 的 get 方法, 对返回值作判断
     :param url: 请求的 url
     :param params: 请求参数
     :param headers: 请求头
     :param match_text: 自定义页面匹配信息, 用于判断页面内容是否是自己想要的内容
+    :param exit_on_error: 请求异常时是否结束程序, 为 False 时返回 None
     :return: 请求信息
     """
+    if not exit_on_error:
+        try:
+            req = requests.get(url, params, headers=headers)
+        except requests.RequestException:
+            return
+        return req if req.ok else None
+
     req = requests.get(url, params, headers=headers)
     # 如果请求状态异常, 结束程序
     if not req.ok:
@@ -44,6 +459,48 @@ def requests_get(url, params=None, headers=None, match_text=None):
     return req
 
 
+def get_json_list(url, key, params=None, headers=None):
+    """
+    逐页获取 json 列表接口的全部数据, 每页按 config.json_per_page 请求
+    :param url: 接口 url
+    :param key: 返回 json 中列表数据对应的键
+    :param params: 额外请求参数
+    :param headers: 请求头
+    :return: 列表数据
+    """
+    data = dict() if params is None else params.copy()
+    data['per_page'] = config.json_per_page
+    item_list = list()
+    # 每页实际数量, 默认为请求数量
+    page_size = config.json_per_page
+    # 每页第一项的 id, 接口忽略 page 参数而重复返回同一页时停止
+    first_ids = set()
+    page = 1
+    while True:
+        data['page'] = page
+        json_dict = json.loads(requests_get(url, params=data, headers=headers).text)
+        items = json_dict.get(key) or []
+        if len(items) > 0:
+            if items[0].get('id') in first_ids:
+                break
+            first_ids.add(items[0].get('id'))
+        item_list.extend(items)
+        # 接口返回总数时以总数判断是否还有下一页
+        total = json_dict.get('total_count')
+        if total is not None:
+            if len(item_list) >= int(total):
+                break
+        elif page == 1 and len(items) in config.json_page_size_caps:
+            # 第一页恰好是接口可能限制的单页数量, 以其作为每页数量继续获取
+            page_size = len(items)
+        # 页面获取完毕, 跳出循环
+        if len(items) == 0 or len(items) < page_size:
+            break
+        page += 1
+
+    return item_list
+
+
 def get_trending(trending_type=None, page=None):
     """
     获取热门文章
@@ -66,12 +523,25 @@ def get_trending(trending_type=None, page=None):
     # 获取 header
     headers = config.headers.copy()
 
-    post_slug_list = list()
-    # 初始化参数
-    data = {"page": 1, "seen_snote_ids[]": set()}
-    seen_note_ids = data.get('seen_snote_ids[]')
     page_from, page_to = page_parse(page, config.trending_post_per_page,
                                     config.trending_post_max_page * config.trending_post_per_page)
+    # 记录文章列表信息, 迭代时才逐页获取
+    message['post_slug_list'] = iter_trending_slugs(url, headers, page_from, page_to)
+    return message
+
+
+def iter_trending_slugs(url, headers, page_from, page_to):
+    """
+    逐页获取热门文章 slug
+    :param url: 热门 url
+    :param headers: 请求头
+    :param page_from: 起始页码
+    :param page_to: 结束页码
+    :return: 文章 slug 生成器
+    """
+    # 初始化参数, 已获取的文章 id 需要全部回传, 使用 array 紧凑存储
+    data = {"page": 1, "seen_snote_ids[]": array.array('q')}
+    seen_note_ids = data.get('seen_snote_ids[]')
     # 获取文章列表
     next_page = 1
     while next_page < page_to:
@@ -82,20 +552,27 @@ def get_trending(trending_type=None, page=None):
         html = requests_get(url, params=data, headers=headers).text
         soup = BeautifulSoup(html, 'lxml')
         list_li = soup.select("ul.note-list li")
+        post_slug_list = list()
         for i in list_li:
-            seen_note_ids.add(str(i.get('data-note-id')))
+            note_id = i.get('data-note-id')
+            # 跳过不是文章的条目
+            if note_id is None or not note_id.isdigit():
+                continue
+            note_id = int(note_id)
+            if note_id not in seen_note_ids:
+                seen_note_ids.append(note_id)
             # 只记录目标页码
             if page_from <= next_page:
                 post_slug_list.append(i.select('a.title')[0].get('href')[3:])
+        page_size = len(list_li)
+        soup.decompose()
+
+        yield from post_slug_list
 
         # 页面获取完毕, 跳出循环
-        if len(list_li) < config.trending_post_per_page:
+        if page_size < config.trending_post_per_page:
             break
 
-    # 记录文章列表信息
-    message['post_slug_list'] = post_slug_list
-    return message
-
 
 def get_notebook(notebook_url=None, notebook_slug=None, page=None):
     """
@@ -152,18 +629,18 @@ def get_notebook(notebook_url=None, notebook_slug=None, page=None):
     # 获取文集id
     notebook_id = soup.find('div', attrs={'data-vcomp': 'book-chapters'}).get('props-data-book-id')
     message['notebook_id'] = notebook_id
+    soup.decompose()
 
     # 修改请求头信息
     headers['accept'] = 'application/json'
 
-    page_url = (
-            config.jianshu_root_url + 'books/' +
-            str(message['notebook_id']) +
-            '/chapters?page=1&count=10&order=desc'
-    )
+    page_url = config.jianshu_root_url + 'books/' + str(message['notebook_id']) + '/chapters'
+    # 按接口允许的最大数量请求, page 参数仍按 config.post_per_page 计算
+    json_per_page = config.json_per_page
+    data = {'page': 1, 'count': json_per_page, 'order': 'desc'}
 
-    # 获取连载总数
-    page_data = requests_get(page_url, headers=headers).text
+    # 获取连载总数, 第一页数据同时用于文章列表
+    page_data = requests_get(page_url, params=data, headers=headers).text
     page_json = json.loads(page_data)
     total = page_json.get('total_count')
     message['post_total_count'] = total
@@ -172,24 +649,42 @@ def get_notebook(notebook_url=None, notebook_slug=None, page=None):
     page_per = config.post_per_page
     # 页码范围
     page_from, page_to = page_parse(page, page_per, total)
-    # 获取文章列表
-    post_list = list()
-    for page in range(page_from, page_to + 1):
-        page_url = (
-                config.jianshu_root_url + 'books/' + \
-                str(message['notebook_id']) + '/chapters?page=' + str(page) + '&count=10&order=desc'
-        )
-        page_data = requests_get(page_url, headers=headers).text
-        page_json = json.loads(page_data)
-        # 获取文章 slug
-        for post in page_json.get('chapters'):
-            post_list.append(post.get('slug'))
-
-    message['post_slug_list'] = post_list
+    # 记录文章列表信息, 迭代时才逐页获取
+    message['post_slug_list'] = iter_notebook_slugs(page_url, headers, page_json.get('chapters'), total,
+                                                    (page_from - 1) * page_per, page_to * page_per)
 
     return message
 
 
+def iter_notebook_slugs(page_url, headers, first_chapters, total, index_from, index_to):
+    """
+    逐页获取文集 / 连载文章 slug, 只请求覆盖目标范围的接口页
+    :param page_url: 文集章节接口 url
+    :param headers: 请求头
+    :param first_chapters: 已获取的第一页章节数据
+    :param total: 章节总数
+    :param index_from: 目标文章起始下标
+    :param index_to: 目标文章结束下标 (不含)
+    :return: 文章 slug 生成器
+    """
+    data = {'page': 1, 'count': config.json_per_page, 'order': 'desc'}
+    # 接口可能限制单页数量, 第一页未包含全部章节时以实际返回数量作为每页数量
+    json_per_page = config.json_per_page
+    if 0 < len(first_chapters) < total:
+        json_per_page = len(first_chapters)
+    for json_page in range(index_from // json_per_page + 1, (index_to - 1) // json_per_page + 2):
+        if json_page == 1:
+            chapters = first_chapters
+        else:
+            data['page'] = json_page
+            page_data = requests_get(page_url, params=data, headers=headers).text
+            chapters = json.loads(page_data).get('chapters')
+        # 获取文章 slug
+        for index, post in enumerate(chapters, (json_page - 1) * json_per_page):
+            if index_from <= index < index_to:
+                yield post.get('slug')
+
+
 def get_user(url=None, user_slug=None, page=None):
     """
     获取用户信息
@@ -238,29 +733,32 @@ def get_user(url=None, user_slug=None, page=None):
             pass
     # 个人简介
     message['bio'] = soup.select('div.js-intro')[0].text
+    soup.decompose()
     # TODO 他关注的专题/文集/连载 url: https://www.jianshu.com/users/54df556b30dd/subscriptions
     # TODO 他喜欢的文章 url: https://www.jianshu.com/users/54df556b30dd/liked_notes
 
-    # 他的文集
-    # TODO notebooks 可能有多页, 这里只获取了第一页
-    collection_and_notebooks_url = (
-            config.jianshu_root_url +
-            "/users/" + message['user_slug'] +
-            "/collections_and_notebooks?slug=" +
-            message['user_slug']
-    )
-
     headers['accept'] = 'application/json'
-    collection_and_notebooks_json = requests_get(collection_and_notebooks_url, headers=headers).text
-    collection_and_notebooks_dict = json.loads(collection_and_notebooks_json)
-    # TODO 获取专题列表
+    user_url = config.jianshu_root_url + "users/" + message['user_slug']
+
+    # 他的文集, 逐页获取全部文集
+    notebooks = get_json_list(user_url + "/notebooks", 'notebooks',
+                              params={'slug': message['user_slug'], 'type': 'manager'}, headers=headers)
     # 获取文集id
-    notebooks = collection_and_notebooks_dict.get('notebooks')
     notebooks_id_list = list()
     for i in notebooks:
         notebooks_id_list.append(i.get('id'))
     message['notebooks_id_list'] = notebooks_id_list
 
+    # 他创建和管理的专题, 逐页获取全部专题
+    collections_slug_list = list()
+    for collection_type in ('own', 'manager'):
+        collections = get_json_list(user_url + "/collections", 'collections',
+                                    params={'slug': message['user_slug'], 'type': collection_type}, headers=headers)
+        for i in collections:
+            if i.get('slug') not in collections_slug_list:
+                collections_slug_list.append(i.get('slug'))
+    message['collections_slug_list'] = collections_slug_list
+
     # 获取文章列表
     # TODO 获取动态排序文章列表
     # TODO 最新评论排序
@@ -275,16 +773,9 @@ def get_user(url=None, user_slug=None, page=None):
     headers['accept'] = 'text/html, */*; q=0.01'
     headers['x-infinitescroll'] = "true"
     headers['x-requested-with'] = "XMLHttpRequest"
-    note_slug_list = list()
-    for i in range(page_from, page_to + 1):
-        post_url = config.jianshu_user_url + message['user_slug'] + "?order_by=shared_at&page=" + str(i)
-        post_html = requests_get(post_url, headers=headers)
-        post_soup = BeautifulSoup(post_html.text, 'lxml')
-        note_slugs_html = post_soup.select("a.title")
-
-        for a in note_slugs_html:
-            note_slug_list.append(a.get('href')[3:])
-    message['note_slug_list'] = note_slug_list
+    # 文章列表, 迭代时才逐页获取
+    post_url = config.jianshu_user_url + message['user_slug'] + "?order_by=shared_at&page="
+    message['note_slug_list'] = iter_html_slugs(post_url, headers, page_from, page_to)
 
     return message
 
@@ -333,6 +824,7 @@ def get_collection(url=None, collection_slug=None, page=None):
     # 收录文章数量
     info = soup.select('.info')[0].text
     message['post_number'] = re.findall("收录了(\d*)篇文章", info)[0]
+    soup.decompose()
     # 获取管理员信息
     # 初始化 headers, 当前页码, 总页码
     headers['accept'] = 'application/json'
@@ -373,27 +865,38 @@ def get_collection(url=None, collection_slug=None, page=None):
     headers['x-infinitescroll'] = "true"
     headers['x-requested-with'] = "XMLHttpRequest"
 
-    post_slug_list = list()
+    # 专题文章 slug 列表, 迭代时才逐页获取
+    note_list_url = 'https://www.jianshu.com/c/' + message['slug'] + '?order_by=added_at&page='
+    message['post_slug_list'] = iter_html_slugs(note_list_url, headers, page_from, page_to)
+
+    return message
+
+
+def iter_html_slugs(url, headers, page_from, page_to):
+    """
+    逐页获取无限滚动页面中的文章 slug
+    :param url: 列表页 url, 以 page= 结尾
+    :param headers: 请求头
+    :param page_from: 起始页码
+    :param page_to: 结束页码
+    :return: 文章 slug 生成器
+    """
     for i in range(page_from, page_to + 1):
-        note_list_url = 'https://www.jianshu.com/c/' + message['slug'] + '?order_by=added_at&page=' + str(i)
-        note_list_html = requests_get(note_list_url, headers=headers)
+        note_list_html = requests_get(url + str(i), headers=headers)
         note_list_soup = BeautifulSoup(note_list_html.text, 'lxml')
-        note_list = note_list_soup.select('a.title')
-        for note in note_list:
-            # 这里从 href 里面截取了 slug
-            post_slug_list.append(note.get('href')[3:])
-
-    # 专题文章 slug 列表
-    message['post_slug_list'] = post_slug_list
+        # 这里从 href 里面截取了 slug
+        post_slug_list = [note.get('href')[3:] for note in note_list_soup.select('a.title')]
+        note_list_soup.decompose()
 
-    return message
+        yield from post_slug_list
 
 
-def get_post(url=None, post_slug=None):
+def get_post(url=None, post_slug=None, content_index=None):
     """
     获取单篇文章数据
     :param url: 文章 url
     :param post_slug: 文章 slug
+    :param content_index: 文章内容索引, 指定时跳过重复文章的内容转换
     :return: 文章信息
     """
     # 设置文章 url
@@ -412,12 +915,13 @@ def get_post(url=None, post_slug=None):
     soup = BeautifulSoup(html.text, 'lxml')
 
     # 记录文章信息
-    post_message = {}
+    post_message = Post()
     # 获取文章标题
     try:
         title = soup.select('.article h1')[0].text
     except IndexError as e:
         # 文章异常, 一般是正在审核中
+        soup.decompose()
         return
 
     # 获取作者 id
@@ -430,31 +934,31 @@ def get_post(url=None, post_slug=None):
     message_json = json.loads(message[0].text)
 
     # 文章标题
-    post_message['title'] = title
+    post_message.title = title
     # 作者昵称
-    post_message['author_name'] = message_json['note']['author']['nickname']
+    post_message.author_name = message_json['note']['author']['nickname']
     # 作者 id
-    post_message['author_id'] = message_json['note']['user_id']
+    post_message.author_id = message_json['note']['user_id']
     # 作者 slug
-    post_message['author_slug'] = author_slug
+    post_message.author_slug = author_slug
     # 文章最后编辑时间
-    post_message['publish_time'] = publish_time
+    post_message.publish_time = publish_time
     # 文章字数统计
-    post_message['word_count'] = message_json['note']['public_wordage']
+    post_message.word_count = message_json['note']['public_wordage']
     # 文章阅读数量统计
-    post_message['views_count'] = message_json['note']['views_count']
+    post_message.views_count = message_json['note']['views_count']
     # 文章所属笔记本 id
-    post_message['notebook_id'] = message_json['note']['notebook_id']
+    post_message.notebook_id = message_json['note']['notebook_id']
     # 文章 id
-    post_message['post_id'] = message_json['note']['id']
+    post_message.post_id = message_json['note']['id']
     # 文章 slug
-    post_message['post_slug'] = message_json['note']['slug']
+    post_message.post_slug = message_json['note']['slug']
     # 文章喜欢数量统计
-    post_message['likes_count'] = message_json['note']['likes_count']
+    post_message.likes_count = message_json['note']['likes_count']
     # 文章是否可评论
-    post_message['commentable'] = message_json['note']['commentable']
+    post_message.commentable = message_json['note']['commentable']
     # 文章评论数量
-    post_message['comments_count'] = message_json['note']['comments_count']
+    post_message.comments_count = message_json['note']['comments_count']
     # 文章内容
     content = soup.select('.show-content')[0]
     # 提取图片并获取真实链接
@@ -469,17 +973,82 @@ def get_post(url=None, post_slug=None):
     img_captions = content.select('.image-caption')
     [img_caption.extract() for img_caption in img_captions]
 
+    # 内容去重
+    if content_index is not None:
+        normalized = normalize_content(content)
+        # 内容过短时不去重, 避免没有文字和图片的文章互相误判
+        if len(normalized) >= config.dedupe_min_length:
+            content_hash = hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+            original_slug = content_index.find_exact(post_message.post_slug, content_hash)
+            # 内容完全相同时无需计算 SimHash
+            content_simhash = None
+            if original_slug is None:
+                content_simhash = simhash(normalized)
+                original_slug = content_index.find_near(post_message.post_slug, content_simhash)
+            if original_slug is not None:
+                # 重复文章只记录原文章, 不转换内容
+                soup.decompose()
+                content_index.add_alias(post_message.post_slug, original_slug)
+                post_message.duplicate_of = original_slug
+                return post_message
+            content_index.add(post_message.post_slug, content_hash, content_simhash)
+
     html2markdown = html2text.HTML2Text()
     markdown = html2markdown.handle(str(content))
+    # 转换完成后立即释放解析树
+    soup.decompose()
     # 修复 html2text 错误换行
     # TODO 这里需要优化, 只针对 a 标签和图片标签换行即可
     markdown = markdown.replace('-\n', '-')
     # 添加文章内容
-    post_message['content'] = markdown
+    post_message.content = markdown
 
     return post_message
 
 
+def get_post_metrics(url=None, post_slug=None):
+    """
+    获取单篇文章的统计数据, 只解析页面自带的 json 信息, 不转换文章内容
+    :param url: 文章 url
+    :param post_slug: 文章 slug
+    :return: 文章统计数据
+    """
+    # 设置文章 url
+    if url is None:
+        if post_slug is None:
+            print("参数错误")
+            sys.exit()
+        else:
+            url = config.jianshu_post_url + post_slug
+    # 获取网页源码
+    headers = config.headers.copy()
+    html = requests_get(url=url, headers=headers, exit_on_error=False)
+    if html is None:
+        # 文章已删除或请求失败
+        return
+    # 只解析 json 信息所在的 script 标签
+    only_page_data = SoupStrainer('script', attrs={"data-name": "page-data", "type": "application/json"})
+    soup = BeautifulSoup(html.text, 'lxml', parse_only=only_page_data)
+    message = soup.findAll('script')
+    if len(message) == 0:
+        # 文章异常, 一般是正在审核中
+        return
+    note = json.loads(message[0].text).get('note')
+    if note is None:
+        return
+
+    # 记录文章统计数据
+    metrics = dict()
+    # 文章 id
+    metrics['post_id'] = note['id']
+    # 文章 slug
+    metrics['post_slug'] = note['slug']
+    for field in config.monitor_fields:
+        metrics[field] = note[field]
+
+    return metrics
+
+
 def write_post(post, output='./'):
     """
     将单篇文章写入文件
@@ -490,13 +1059,17 @@ def write_post(post, output='./'):
     # 容错
     if post is None:
         return
-    
-    post_content = post.pop('content')
+    # 重复文章不写入
+    if post.duplicate_of is not None:
+        if verbose:
+            print('重复文章\t', post.post_slug, '\t--->\t', post.duplicate_of)
+        return
+
     # 检查文件夹是否存在
     if not os.path.exists(output):
         os.mkdir(output)
     # 定义文件名
-    file_path = output + "/" + post['title'].replace('/', '-') + ".md"
+    file_path = output + "/" + post.title.replace('/', '-') + ".md"
     # 计数
     global download_count
     download_count += 1
@@ -505,10 +1078,297 @@ def write_post(post, output='./'):
     with open(file_path, "w") as f:
         f.write("---\n")
         # 写入文章元数据
-        [f.write(i + ":\t" + str(post.get(i)) + "\n") for i in post]
+        [f.write(i + ":\t" + str(value) + "\n") for i, value in post.meta()]
         f.write("\n---\n")
-        # 写入文章内容
-        f.write(post_content)
+        # 写入文章内容, 写入后释放
+        f.write(post.content)
+    post.content = None
+
+
+def memory_usage():
+    """
+    获取当前进程内存占用
+    :return: 内存占用 (MB), 无法获取当前内存占用时返回 None
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError):
+        # 非 Linux 系统只能获取峰值内存, 无法判断当前占用
+        return None
+
+
+def release_memory():
+    """
+    回收内存并清理缓存, 尽量将空闲内存归还给系统
+    :return: None
+    """
+    gc.collect()
+    re.purge()
+    try:
+        # glibc 不会主动归还空闲的堆内存
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def check_memory(resume, slug):
+    """
+    检查内存占用
+    超出软限制时暂停获取文章列表并回收内存, 回收后仍然超出预算则结束程序
+    :param resume: 文章列表获取线程的继续标记, 清除时暂停获取
+    :param slug: 最后写入的文章 slug
+    :return: None
+    """
+    if memory_budget <= 0:
+        return
+    usage = memory_usage()
+    if usage is None:
+        return
+    if usage <= memory_budget * config.memory_soft_ratio:
+        # 内存恢复后继续获取文章列表
+        resume.set()
+        return
+
+    resume.clear()
+    release_memory()
+    usage = memory_usage()
+    if usage <= memory_budget:
+        return
+
+    print("内存超出预算!")
+    print('usage:\t', int(usage), 'MB')
+    print('budget:\t', memory_budget, 'MB')
+    print('已写入文章数量:\t', download_count)
+    print('最后写入文章:\t', slug)
+    sys.exit()
+
+
+def produce_slugs(slug_list, slug_queue, resume, errors):
+    """
+    遍历文章列表并放入队列, 队列满或暂停时阻塞, 从而暂停获取后续列表页
+    :param slug_list: 文章 slug 列表或生成器
+    :param slug_queue: 有界队列
+    :param resume: 继续标记, 清除时暂停获取
+    :param errors: 记录遍历时出现的异常
+    :return: None
+    """
+    try:
+        slug_iter = iter(slug_list)
+        end = object()
+        while True:
+            resume.wait()
+            slug = next(slug_iter, end)
+            if slug is end:
+                break
+            slug_queue.put(slug)
+    except BaseException as e:
+        # requests_get 出错时会调用 sys.exit, 交给主线程处理
+        errors.append(e)
+    finally:
+        # 结束标记
+        slug_queue.put(None)
+
+
+def queued_slugs(slug_queue, resume):
+    """
+    从队列中依次取出文章 slug
+    :param slug_queue: 有界队列
+    :param resume: 文章列表获取线程的继续标记
+    :return: 文章 slug 生成器
+    """
+    while True:
+        if not resume.is_set() and slug_queue.empty():
+            # 队列中的文章已处理完, 暂停获取也无法再降低内存占用, 回收后继续
+            release_memory()
+            resume.set()
+        slug = slug_queue.get()
+        if slug is None:
+            break
+        yield slug
+
+
+def crawl_posts(slug_list, output='./', content_index=None):
+    """
+    抓取列表中的全部文章并写入文件
+    列表获取在单独线程中进行, 通过有界队列与文章抓取衔接, 内存中只保留少量 slug
+    :param slug_list: 文章 slug 列表或生成器
+    :param output: 输出目录
+    :param content_index: 文章内容索引, 指定时跳过重复文章
+    :return: None
+    """
+    resume = threading.Event()
+    resume.set()
+    errors = list()
+    producer = None
+    if profiling:
+        # 性能分析时在主线程中获取文章列表, 避免列表线程的内存分配计入文章抓取阶段
+        slugs = iter(slug_list)
+    else:
+        slug_queue = queue.Queue(config.slug_queue_size)
+        producer = threading.Thread(target=produce_slugs, args=(slug_list, slug_queue, resume, errors))
+        producer.daemon = True
+        producer.start()
+        slugs = queued_slugs(slug_queue, resume)
+
+    # 文章去重
+    seen_slugs = BloomFilter(config.bloom_capacity, config.bloom_error_rate)
+    try:
+        for slug in slugs:
+            if not seen_slugs.add(slug):
+                continue
+            write_post(get_post(post_slug=slug, content_index=content_index), output)
+            check_memory(resume, slug)
+    finally:
+        # 结束或因内存超出预算中断时都保存内容索引, 以便重新运行时继续
+        if content_index is not None:
+            content_index.save()
+
+    if producer is not None:
+        producer.join()
+    if errors:
+        raise errors[0]
+
+
+def load_monitor_state(state_path):
+    """
+    读取监控状态
+    :param state_path: 状态文件路径
+    :return: 以文章 id 为键的上次统计数据
+    """
+    if not os.path.exists(state_path):
+        return dict()
+    with open(state_path) as f:
+        return json.load(f)
+
+
+def save_monitor_state(state, state_path):
+    """
+    保存监控状态, 先写临时文件再替换, 避免中断时损坏
+    :param state: 监控状态
+    :param state_path: 状态文件路径
+    :return: None
+    """
+    with open(state_path + '.tmp', 'w') as f:
+        json.dump(state, f)
+    os.replace(state_path + '.tmp', state_path)
+
+
+def monitor_posts(slug_list, output='./', list_slugs=None):
+    """
+    监控文章统计数据变化, 只记录发生变化的字段
+    变化的文章缩短下次检查间隔, 未变化的文章延长间隔, 按 Ctrl+C 结束
+    :param slug_list: 文章 slug 列表或生成器
+    :param output: 输出目录, 用于保存监控状态和变化记录
+    :param list_slugs: 重新获取文章列表的函数, 定期调用以加入新文章、移除已不在列表中的文章
+    :return: None
+    """
+    # 检查文件夹是否存在
+    if not os.path.exists(output):
+        os.makedirs(output)
+    state_path = output + "/" + config.monitor_state_file
+    log_path = output + "/" + config.monitor_log_file
+    # 以文章 id 为键的上次统计数据
+    state = load_monitor_state(state_path)
+    # 以 slug 为键的上次检查时间
+    slug_state = dict((post['post_slug'], post) for post in state.values())
+
+    # 按下次检查时间排序的待检查队列
+    schedule = list()
+    # 当前列表中的文章, 以及已在队列中的文章
+    active_slugs = set()
+    scheduled_slugs = set()
+    # 连续请求失败次数
+    failures = dict()
+    now = time.time()
+    saved_at = now
+    relist_at = now + config.monitor_relist_interval
+    try:
+        with open(log_path, 'a') as log:
+            while True:
+                # 加入新文章, 已在队列中的文章保持原有检查时间
+                if slug_list is not None:
+                    slug_list = set(slug_list)
+                    for slug in slug_list - scheduled_slugs:
+                        post = slug_state.get(slug)
+                        next_time = now if post is None else post['checked_at'] + post['interval']
+                        heapq.heappush(schedule, (next_time, slug))
+                        scheduled_slugs.add(slug)
+                    active_slugs = slug_list
+                    slug_list = None
+
+                if not schedule and list_slugs is None:
+                    break
+                # 等待到下一篇文章的检查时间或重新获取列表的时间
+                next_time = schedule[0][0] if schedule else relist_at
+                if list_slugs is not None:
+                    next_time = min(next_time, relist_at)
+                wait = next_time - time.time()
+                if wait > 0:
+                    time.sleep(wait)
+                now = time.time()
+                if list_slugs is not None and now >= relist_at:
+                    try:
+                        slug_list = list_slugs()
+                        relist_at = now + config.monitor_relist_interval
+                    except (SystemExit, requests.RequestException):
+                        # 列表获取失败时沿用当前列表, 稍后重试
+                        relist_at = now + config.monitor_interval_min
+                    continue
+
+                next_time, slug = heapq.heappop(schedule)
+                if slug not in active_slugs:
+                    # 文章已不在列表中, 不再检查
+                    failures.pop(slug, None)
+                    scheduled_slugs.discard(slug)
+                    continue
+
+                metrics = get_post_metrics(post_slug=slug)
+                now = time.time()
+                if metrics is None:
+                    # 文章异常或请求失败, 从最小间隔开始按失败次数加倍重试
+                    failures[slug] = failures.get(slug, 0) + 1
+                    retry = min(config.monitor_interval_max, config.monitor_interval_min * 2 ** (failures[slug] - 1))
+                    heapq.heappush(schedule, (now + retry, slug))
+                    continue
+                failures.pop(slug, None)
+                post_id = str(metrics['post_id'])
+                post = state.get(post_id)
+
+                # 记录变化的字段, 第一次检查时记录全部字段
+                delta = dict()
+                for field in config.monitor_fields:
+                    if post is None or post.get(field) != metrics[field]:
+                        delta[field] = metrics[field]
+
+                if post is None:
+                    post = {'interval': config.monitor_interval}
+                    state[post_id] = post
+                elif delta:
+                    post['interval'] = max(config.monitor_interval_min, post['interval'] / 2)
+                else:
+                    post['interval'] = min(config.monitor_interval_max, post['interval'] * 2)
+                post.update(metrics)
+                post['checked_at'] = now
+                slug_state[slug] = post
+
+                if delta:
+                    record = {'timestamp': int(now), 'post_id': metrics['post_id']}
+                    record.update(delta)
+                    log.write(json.dumps(record) + "\n")
+                    log.flush()
+                    if verbose:
+                        print(int(now), '\t', slug, '\t', delta)
+
+                heapq.heappush(schedule, (now + post['interval'], slug))
+                # 定期保存监控状态
+                if now - saved_at >= config.monitor_save_interval:
+                    save_monitor_state(state, state_path)
+                    saved_at = now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        save_monitor_state(state, state_path)
 
 
 def page_parse(page, page_per, total):
@@ -582,7 +1442,11 @@ def cli_arguments(argv):
                                                 "notebook-slug=",
                                                 "notebook-url=",
                                                 "weekly",
-                                                "monthly"
+                                                "monthly",
+                                                "memory-budget=",
+                                                "monitor",
+                                                "dedupe",
+                                                "profile"
                                                 ])
     except getopt.GetoptError as e:
         print(e.msg)
@@ -604,6 +1468,8 @@ def cli_arguments(argv):
     notebook_slug = None
     notebook_url = None
     trending_type = None
+    monitor = False
+    dedupe = False
 
     for opt, arg in opts:
         if opt == '-v':
@@ -645,38 +1511,78 @@ def cli_arguments(argv):
             # 热门
             process = 'trending'
             trending_type = opt[2:]
+        elif opt == '--memory-budget':
+            global memory_budget
+            memory_budget = int(arg)
+        elif opt == '--monitor':
+            # 监控文章统计数据
+            monitor = True
+        elif opt == '--dedupe':
+            # 跳过重复文章
+            dedupe = True
+        elif opt == '--profile':
+            # 性能分析
+            global profiling
+            profiling = True
         else:
             print('Wrong arguments')
             sys.exit()
 
+    # 性能分析, 程序结束时输出到输出根目录
+    if profiling:
+        profiler = Profiler()
+        profiler.install(globals())
+        atexit.register(profiler.stop, output)
+        profiler.start()
+
+    # 内容索引保存在输出根目录, 供不同专题 / 文集之间去重
+    content_index = None
+    if dedupe:
+        if not os.path.exists(output):
+            os.makedirs(output)
+        content_index = ContentIndex(output + "/" + config.content_index_file)
+
     # 执行程序
-    if process == "post":
-        post = get_post(post_url, post_slug)
+    # 待抓取的文章列表, 以及监控模式下重新获取文章列表的函数
+    slug_list = None
+    list_slugs = None
+    if process == "post" and monitor:
+        slug_list = [post_slug or urllib.parse.urlparse(post_url).path.rstrip('/').split('/')[-1]]
+    elif process == "post":
+        post = get_post(post_url, post_slug, content_index)
         write_post(post, output)
+        if content_index is not None:
+            content_index.save()
     elif process == "collection":
         collection = get_collection(collection_url, collection_slug, page)
         output += "/" + collection.get('title')
-        for i in collection.get('post_slug_list'):
-            write_post(get_post(post_slug=i), output)
+        slug_list = collection.get('post_slug_list')
+        list_slugs = lambda: get_collection(collection_url, collection_slug, page).get('post_slug_list')
     elif process == "user":
         user = get_user(user_url, user_slug, page)
         output += "/" + user.get("user_name")
-        for i in user.get('note_slug_list'):
-            write_post(get_post(post_slug=i), output)
+        slug_list = user.get('note_slug_list')
+        list_slugs = lambda: get_user(user_url, user_slug, page).get('note_slug_list')
     elif process == 'notebook':
         notebook = get_notebook(notebook_url, notebook_slug, page)
         output += "/" + notebook.get('title')
-        for i in notebook.get('post_slug_list'):
-            write_post(get_post(post_slug=i), output)
+        slug_list = notebook.get('post_slug_list')
+        list_slugs = lambda: get_notebook(notebook_url, notebook_slug, page).get('post_slug_list')
     elif process == 'trending':
         trending = get_trending(trending_type, page)
         output += "/" + trending.get('title')
-        for i in trending.get('post_slug_list'):
-            write_post(get_post(post_slug=i), output)
+        slug_list = trending.get('post_slug_list')
+        list_slugs = lambda: get_trending(trending_type, page).get('post_slug_list')
     else:
         print("未知流程")
         sys.exit()
 
+    # 抓取文章或监控文章统计数据
+    if slug_list is not None and monitor:
+        monitor_posts(slug_list, output, list_slugs)
+    elif slug_list is not None:
+        crawl_posts(slug_list, output, content_index)
+
     print("执行完毕")
 
 
@@ -716,6 +1622,15 @@ def show_help():
                                 n:m 表示抓取第 n 页到第 m 页
         --output            指定输出目录
                                 不指定 output 参数时, 默认为当前目录
+        --memory-budget     内存上限, 单位 MB, 仅 Linux 有效
+                                达到 80% 时暂停获取文章列表并回收内存, 仍然超出则保存索引并结束抓取, 0 表示不限制
+        --monitor           监控文章阅读/喜欢/评论数量, 无需参数值
+                                只将变化的字段追加到输出目录下的记录文件, 按 Ctrl+C 结束
+        --dedupe            跳过重复和近似重复的文章, 无需参数值
+                                内容索引保存在输出目录下, 多次运行之间共用
+        --profile           性能分析, 无需参数值
+                                各阶段耗时和内存分配写入输出目录下的 profile.txt
+                                cProfile 数据写入 profile.prof, 火焰图折叠栈写入 profile.folded
     '''
     print(help_message)
 